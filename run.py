@@ -1,10 +1,4 @@
-
-import subprocess, sys
-
-def main():
-    code = subprocess.call([sys.executable, "-m", "src.analysis"])
-    if code != 0:
-        raise SystemExit(code)
+from src.analysis import main
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,29 @@
+"""
+Builds the optional Cython haversine kernel (src/_legs.pyx) in place:
+
+    python setup.py build_ext --inplace
+
+This is the only supported use; the repo is not meant to be pip-installed.
+"""
+
+from setuptools import setup, Extension
+
+try:
+    from Cython.Build import cythonize
+except ImportError:  # without Cython there is nothing to build
+    cythonize = None
+
+extensions = [
+    Extension(
+        "src._legs",
+        ["src/_legs.pyx"],
+        libraries=["m"],
+        extra_compile_args=["-O3", "-ffast-math", "-march=native"],
+    )
+]
+
+setup(
+    name="transport-time-series-sports",
+    packages=["src"],
+    ext_modules=cythonize(extensions, language_level=3) if cythonize is not None else [],
+)
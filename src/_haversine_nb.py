@@ -0,0 +1,28 @@
+"""
+Numba-compiled haversine kernel for batch leg distances.
+Optional: importing this module requires numba.
+"""
+
+import math
+import numpy as np
+from numba import njit
+
+R = 6371.0
+
+@njit(fastmath=True, cache=True)
+def haversine_nb(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance (in km) between 1-D float arrays of points, element-wise.
+    The result has the dtype of lat1.
+    """
+    n = lat1.shape[0]
+    out = np.empty_like(lat1)
+    for i in range(n):
+        phi1 = math.radians(lat1[i])
+        phi2 = math.radians(lat2[i])
+        dphi = phi2 - phi1
+        dlambda = math.radians(lon2[i] - lon1[i])
+        a = (math.sin(dphi/2)**2 +
+             math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2)
+        out[i] = 2 * R * math.asin(math.sqrt(a))
+    return out
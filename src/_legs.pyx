@@ -0,0 +1,29 @@
+# cython: language_level=3
+"""
+Cython haversine kernel for batch leg distances.
+Build in place with: python setup.py build_ext --inplace
+"""
+
+cimport cython
+from cython cimport floating
+from libc.math cimport sin, cos, asin, sqrt, M_PI
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cpdef legs_km(const floating[::1] lat1, const floating[::1] lon1,
+              const floating[::1] lat2, const floating[::1] lon2, floating[::1] out):
+    """
+    Fill out[i] with the great-circle distance (in km) between
+    (lat1[i], lon1[i]) and (lat2[i], lon2[i]). All arrays share one float dtype.
+    """
+    cdef Py_ssize_t i, n = lat1.shape[0]
+    cdef double R = 6371.0, rad = M_PI / 180.0
+    cdef double phi1, phi2, dphi, dlam, a
+    for i in range(n):
+        phi1 = lat1[i] * rad
+        phi2 = lat2[i] * rad
+        dphi = phi2 - phi1
+        dlam = (lon2[i] - lon1[i]) * rad
+        a = sin(dphi/2)**2 + cos(phi1)*cos(phi2)*sin(dlam/2)**2
+        out[i] = 2 * R * asin(sqrt(a))
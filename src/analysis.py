@@ -12,29 +12,109 @@ Steps:
 """
 
 import os
+import hashlib
+import pickle
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 
-from src.utils import add_coords, compute_trip_legs, basic_cost_model
+from src.utils import add_coords, city_dtype, compute_trip_legs, basic_cost_model
 
 DATA_DIR = "data"
 ASSETS_DIR = "assets"
 BASE_CITY = "Dallas"
+SARIMAX_CACHE = os.path.join(ASSETS_DIR, "sarimax.pkl")
+
+def _cache_key(model, nobs):
+    """
+    Hash of everything a cached fit depends on: the statsmodels version, the model spec
+    (init kwargs and variable names) and the first nobs observations with their dates.
+    """
+    import statsmodels
+
+    kwds = {k: v for k, v in model._get_init_kwds().items() if k not in ("endog", "exog")}
+    h = hashlib.sha1()
+    h.update(repr((statsmodels.__version__, sorted(kwds.items()),
+                   model.endog_names, model.exog_names)).encode())
+    for arr in (model.endog, model.exog):
+        if arr is not None:
+            h.update(np.ascontiguousarray(arr[:nobs], dtype=np.float64).tobytes())
+    # Dates and frequency too: the same values on other weeks must not reuse the cached fit
+    index = model.data.row_labels[:nobs]
+    if isinstance(index, pd.DatetimeIndex):
+        index = index.as_unit("ns")
+        h.update(np.ascontiguousarray(index.asi8).tobytes())
+    else:
+        h.update(np.ascontiguousarray(index, dtype=np.int64).tobytes())
+    h.update(str(getattr(index, "freqstr", None)).encode())
+    return h.hexdigest()
+
+def _load_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            key, res = pickle.load(f)
+    except Exception:  # truncated, foreign or written by another statsmodels version; refit
+        return None
+    return key, res
+
+def _save_cache(cache_path, res):
+    with open(cache_path, "wb") as f:
+        pickle.dump((_cache_key(res.model, res.model.nobs), res), f)
+
+def fit_sarimax(endog, exog, order, seasonal_order, cache_path=SARIMAX_CACHE):
+    """
+    Fit SARIMAX, reusing the fit cached at cache_path by a previous run when possible.
+    If the cached model has the same spec and statsmodels version and was fit on a prefix
+    of endog/exog (dates included), the new observations are appended with refit=False
+    instead of re-optimizing. Otherwise the cached parameters seed the refit when the
+    parameterization matches. Delete cache_path to force a cold refit.
+    """
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    model = SARIMAX(endog, order=order, seasonal_order=seasonal_order,
+                    exog=exog, enforce_stationarity=False, enforce_invertibility=False)
+    start_params = None
+    cached = _load_cache(cache_path)
+    if cached is not None:
+        key, res = cached
+        n = res.model.nobs
+        if n <= model.nobs and key == _cache_key(model, n):
+            if n < model.nobs:
+                res = res.append(endog.iloc[n:], exog=exog.iloc[n:], refit=False)
+                _save_cache(cache_path, res)
+            return res
+        # Start from the previous optimum when the parameterization matches; fewer optimizer
+        # iterations each save a full Kalman filter pass
+        if list(res.model.param_names) == list(model.param_names):
+            start_params = np.asarray(res.params)
+
+    res = model.fit(start_params=start_params, disp=False)
+    _save_cache(cache_path, res)
+    return res
 
 def main():
+    # Heavy plotting/modeling imports are deferred so importing this module stays cheap
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
     os.makedirs(ASSETS_DIR, exist_ok=True)
 
-    df_cities = pd.read_csv(os.path.join(DATA_DIR, "cities.csv"))
-    df_sched = pd.read_csv(os.path.join(DATA_DIR, "schedule.csv"))
-    df_sched["date"] = pd.to_datetime(df_sched["date"])
+    df_cities = pd.read_csv(os.path.join(DATA_DIR, "cities.csv"), engine="pyarrow",
+                            dtype={"city": "string", "lat": "float32", "lon": "float32", "airport": "string"})
+    df_sched = pd.read_csv(os.path.join(DATA_DIR, "schedule.csv"), engine="pyarrow", parse_dates=["date"])
+    # Share one categorical city dtype across frames (compared by integer code)
+    cities = city_dtype(df_cities)
+    df_cities["city"] = df_cities["city"].astype(cities)
+    df_sched["venue_city"] = df_sched["venue_city"].astype(cities)
 
     # Compute travel legs and distances
     legs = compute_trip_legs(df_sched, df_cities, base_city=BASE_CITY)
     # Create weekly time series of distance
-    legs["week"] = legs["date"].dt.to_period("W").apply(lambda r: r.start_time)
-    ts_km_weekly = legs.groupby("week")["km"].sum().sort_index()
+    legs["week"] = legs["date"].dt.to_period("W").dt.start_time
+    ts_km_weekly = legs.groupby("week")["km"].sum().astype(np.float64).sort_index()
     ts_km_weekly.index.name = "week"
 
     # Synthetic cost series tied to weekly km
@@ -43,77 +123,84 @@ def main():
 
     # Fit SARIMAX with exogenous regressor (weekly km)
     # Make both series aligned and regular (weekly index)
-    weekly_index = pd.date_range(ts_km_weekly.index.min(), ts_km_weekly.index.max(), freq="W")
-    km = ts_km_weekly.reindex(weekly_index).fillna(0.0)
-    cost = cost_series.reindex(weekly_index).interpolate()
+    # Weeks from to_period("W") start on Monday, so the regular index is W-MON
+    weekly_index = pd.date_range(ts_km_weekly.index.min(), ts_km_weekly.index.max(), freq="W-MON")
+    if ts_km_weekly.index.equals(weekly_index):
+        km = ts_km_weekly.set_axis(weekly_index)
+    else:
+        km = ts_km_weekly.reindex(weekly_index).fillna(0.0)
+    if cost_series.index.equals(weekly_index):
+        cost = cost_series.set_axis(weekly_index)
+    else:
+        cost = cost_series.reindex(weekly_index).interpolate()
 
     # Train/test split (last 8 weeks as test)
     split = -8 if len(weekly_index) > 10 else -2
     train_cost, test_cost = cost.iloc[:split], cost.iloc[split:]
     train_km, test_km = km.iloc[:split], km.iloc[split:]
 
-    # Fit SARIMAX
-    model = SARIMAX(train_cost, order=(1,0,1), seasonal_order=(1,0,1,52),
-                    exog=train_km, enforce_stationarity=False, enforce_invertibility=False)
-    res = model.fit(disp=False)
+    # Fit SARIMAX; the 52-week seasonal terms need at least two seasons of history
+    seasonal_order = (1,0,1,52) if len(train_cost) >= 2*52 else (0,0,0,0)
+    res = fit_sarimax(train_cost, train_km, order=(1,0,1), seasonal_order=seasonal_order)
 
     # Forecast horizon = len(test) + 12 weeks ahead
     horizon = len(test_cost) + 12
-    exog_future = pd.concat([test_km, pd.Series([0.0]*12, index=pd.date_range(test_km.index[-1]+pd.Timedelta(weeks=1), periods=12, freq="W"))])
-    pred = res.get_forecast(steps=horizon, exog=exog_future)
-    pred_mean = pred.predicted_mean
-    conf = pred.conf_int(alpha=0.2)
+    # Known test-period km followed by zeros for the 12 weeks beyond the data
+    exog_vals = np.zeros(horizon)
+    exog_vals[:len(test_km)] = test_km.to_numpy()
+    exog_future = pd.Series(exog_vals, name=test_km.name,
+                            index=pd.date_range(test_km.index[0], periods=horizon, freq=weekly_index.freq))
+    # Mean and 80% interval from one prediction summary
+    pred = res.get_prediction(start=res.nobs, end=res.nobs + horizon - 1, exog=exog_future)
+    sf = pred.summary_frame(alpha=0.2)
+    pred_mean = sf["mean"]
+    lower = sf["mean_ci_lower"].to_numpy(dtype=float)
+    upper = sf["mean_ci_upper"].to_numpy(dtype=float)
 
     # Save outputs
     out_df = pd.DataFrame({
         "week": pred_mean.index,
         "predicted_cost": pred_mean.values,
-        "lower": conf.iloc[:,0].values,
-        "upper": conf.iloc[:,1].values
+        "lower": lower,
+        "upper": upper
     })
     out_path = os.path.join("assets", "weekly_cost_forecast.csv")
     out_df.to_csv(out_path, index=False)
 
-    # PLOTS
+    # PLOTS (one figure, cleared and reused for each plot)
+    fig, ax = plt.subplots(figsize=(8, 4))
+
     # Plot 1: Weekly km traveled
-    plt.figure()
-    plt.plot(km.index, km.values)
-    plt.title("Weekly Travel Distance (km)")
-    plt.xlabel("Week")
-    plt.ylabel("Kilometers")
-    plt.tight_layout()
-    plt.savefig(os.path.join(ASSETS_DIR, "weekly_km.png"), dpi=160)
-    plt.close()
-
-    
+    ax.plot(km.index, km.values)
+    ax.set_title("Weekly Travel Distance (km)")
+    ax.set_xlabel("Week")
+    ax.set_ylabel("Kilometers")
+    fig.tight_layout()
+    fig.savefig(os.path.join(ASSETS_DIR, "weekly_km.png"), dpi=120)
+
     # Plot 2: Historical cost + forecast (datetime-aware fill_between)
-    import matplotlib.dates as mdates
-    plt.figure()
-    plt.plot(cost.index, cost.values, label="History")
-    plt.plot(pred_mean.index, pred_mean.values, label="Forecast")
-    x_dates = mdates.date2num(pred_mean.index.to_pydatetime())
-    lower = conf.iloc[:,0].values.astype(float)
-    upper = conf.iloc[:,1].values.astype(float)
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-    plt.fill_between(x_dates, lower, upper, alpha=0.2, label="80% CI")
-    plt.title("Flight Cost: History + Forecast")
-    plt.xlabel("Week")
-    plt.ylabel("USD")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(os.path.join(ASSETS_DIR, "cost_forecast.png"), dpi=160)
-    plt.close()
+    ax.clear()
+    ax.plot(cost.index, cost.values, label="History")
+    ax.plot(pred_mean.index, pred_mean.values, label="Forecast")
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    ax.fill_between(pred_mean.index, lower, upper, alpha=0.2, label="80% CI")
+    ax.set_title("Flight Cost: History + Forecast")
+    ax.set_xlabel("Week")
+    ax.set_ylabel("USD")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(os.path.join(ASSETS_DIR, "cost_forecast.png"), dpi=120)
 
     # Plot 3: Cumulative season distance traveled
-    plt.figure()
+    ax.clear()
     cum_km = km.cumsum()
-    plt.plot(cum_km.index, cum_km.values)
-    plt.title("Cumulative Travel Distance (Season)")
-    plt.xlabel("Week")
-    plt.ylabel("Kilometers (cumulative)")
-    plt.tight_layout()
-    plt.savefig(os.path.join(ASSETS_DIR, "cumulative_km.png"), dpi=160)
-    plt.close()
+    ax.plot(cum_km.index, cum_km.values)
+    ax.set_title("Cumulative Travel Distance (Season)")
+    ax.set_xlabel("Week")
+    ax.set_ylabel("Kilometers (cumulative)")
+    fig.tight_layout()
+    fig.savefig(os.path.join(ASSETS_DIR, "cumulative_km.png"), dpi=120)
+    plt.close(fig)
 
     # Export legs to CSV
     legs.to_csv(os.path.join(ASSETS_DIR, "travel_legs.csv"), index=False)
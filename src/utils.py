@@ -1,18 +1,95 @@
 
-import math
+import functools
+import numpy as np
 import pandas as pd
 
-def haversine(lat1, lon1, lat2, lon2):
+def haversine_vec(lat1, lon1, lat2, lon2):
     """
-    Compute great-circle distance (in km) between two points.
+    Compute great-circle distance (in km) between points, element-wise.
+    Accepts scalars or array-likes of matching shape.
     """
     R = 6371.0
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = (math.sin(dphi/2)**2 +
-         math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2)
-    return 2 * R * math.asin(math.sqrt(a))
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lon2 - lon1)
+    a = (np.sin(dphi/2)**2 +
+         np.cos(phi1)*np.cos(phi2)*np.sin(dlambda/2)**2)
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+# Below this many legs, NumPy beats the compiled kernels once numba's ~0.5 s
+# import/JIT-cache load is counted
+LEG_KERNEL_MIN_SIZE = 25_000_000
+
+def legs_haversine(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distances (in km) for 1-D float32 or float64 arrays of leg endpoints.
+    For LEG_KERNEL_MIN_SIZE or more legs, uses a compiled kernel when available
+    (numba, then the Cython extension); otherwise NumPy.
+    """
+    # Every kernel gets the same input: contiguous arrays of one common float dtype
+    dtype = np.result_type(np.float32, *(np.asarray(a).dtype for a in (lat1, lon1, lat2, lon2)))
+    lat1, lon1, lat2, lon2 = (np.ascontiguousarray(a, dtype=dtype) for a in (lat1, lon1, lat2, lon2))
+    if lat1.size < LEG_KERNEL_MIN_SIZE:
+        return haversine_vec(lat1, lon1, lat2, lon2)
+    return _leg_kernel()(lat1, lon1, lat2, lon2)
+
+@functools.lru_cache(maxsize=None)
+def _leg_kernel():
+    # Resolved on first use so importing this module never loads numba
+    try:
+        from src._haversine_nb import haversine_nb
+        return haversine_nb
+    except ImportError:  # numba is optional
+        pass
+    try:
+        from src._legs import legs_km
+    except ImportError:  # build with `python setup.py build_ext --inplace`
+        return haversine_vec
+
+    def cython_kernel(lat1, lon1, lat2, lon2):
+        out = np.empty_like(lat1)
+        legs_km(lat1, lon1, lat2, lon2, out)
+        return out
+    return cython_kernel
+
+def city_dtype(cities_df):
+    """
+    Categorical dtype over the cities in cities_df, in row order, so that category
+    codes index rows of cities_df (and of city_distance_matrix).
+    """
+    return pd.CategoricalDtype(cities_df["city"].tolist())
+
+# From this many cities on, scikit-learn's haversine_distances repays its ~0.8 s import;
+# below it the NumPy broadcast is faster once that import is counted
+SKLEARN_MIN_CITIES = 10_000
+
+def city_distance_matrix(cities_df):
+    """
+    All-pairs great-circle distance matrix (in km) between the rows of cities_df.
+    Built with haversine_vec over every pair; scikit-learn's haversine_distances is used
+    instead for SKLEARN_MIN_CITIES or more cities when installed.
+    Memoized on the coordinates, so the returned matrix is shared and read-only.
+    """
+    return _distance_matrix(tuple(cities_df["lat"].tolist()), tuple(cities_df["lon"].tolist()))
+
+@functools.lru_cache(maxsize=32)
+def _distance_matrix(lats, lons):
+    # float64 even for float32 coordinates: float32 trig drifts past 1e-3 km on long legs,
+    # and the matrix is tiny and built once, so there is no bandwidth to save
+    lat, lon = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+    dist = None
+    if len(lat) >= SKLEARN_MIN_CITIES:
+        try:
+            from sklearn.metrics.pairwise import haversine_distances
+        except ImportError:  # scikit-learn is optional
+            pass
+        else:
+            latlon = np.radians(np.column_stack([lat, lon]))
+            dist = haversine_distances(latlon) * 6371.0
+    if dist is None:
+        dist = haversine_vec(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    dist.setflags(write=False)
+    return dist
 
 def add_coords(df, cities_df, col_name):
     """
@@ -35,41 +112,53 @@ def compute_trip_legs(df_games, cities_df, base_city="Dallas"):
     """
     df = df_games.sort_values("date").reset_index(drop=True)
     df["date"] = pd.to_datetime(df["date"])
-    # Determine where the team needs to be for each game: venue_city
-    # Team always travels to the venue city from the previous venue (or base city initially)
-    legs = []
-    prev_city = base_city
-    prev_date = None
-
-    for _, row in df.iterrows():
-        to_city = row["venue_city"]
-        if to_city != prev_city:
-            # lookup coords
-            from_row = cities_df[cities_df["city"] == prev_city].iloc[0]
-            to_row = cities_df[cities_df["city"] == to_city].iloc[0]
-            km = haversine(from_row["lat"], from_row["lon"], to_row["lat"], to_row["lon"])
-            legs.append({
-                "date": row["date"],
-                "from_city": prev_city,
-                "to_city": to_city,
-                "km": km
-            })
-        prev_city = to_city
-        prev_date = row["date"]
-
-    # After last game, travel home
-    if prev_city != base_city:
-        from_row = cities_df[cities_df["city"] == prev_city].iloc[0]
-        to_row = cities_df[cities_df["city"] == base_city].iloc[0]
-        km = haversine(from_row["lat"], from_row["lon"], to_row["lat"], to_row["lon"])
-        legs.append({
-            "date": prev_date,
-            "from_city": prev_city,
-            "to_city": base_city,
-            "km": km
-        })
-
-    return pd.DataFrame(legs)
+    # Index legs into a precomputed city distance matrix instead of evaluating haversine per leg
+    # (rows addressed by the category codes of a shared city dtype)
+    cities = city_dtype(cities_df)
+    dist = city_distance_matrix(cities_df)
+    venue = df["venue_city"].astype(cities)
+    if venue.isna().any():
+        raise ValueError(f"Venue cities missing from cities_df: {sorted(set(df['venue_city'][venue.isna()]))}")
+    base_code = cities.categories.get_loc(base_city)
+
+    # Team always travels to the venue city from the previous venue (or base city initially).
+    # A trailing stop at base_city on the last game date covers the trip home.
+    stop_dates = df["date"].to_numpy()
+    stop_codes = venue.cat.codes.to_numpy(dtype=np.intp)
+    if len(df):
+        stop_dates = np.append(stop_dates, stop_dates[-1])
+        stop_codes = np.append(stop_codes, base_code)
+    prev_codes = np.roll(stop_codes, 1)
+    prev_codes[:1] = base_code
+    is_leg = prev_codes != stop_codes
+
+    from_codes, to_codes = prev_codes[is_leg], stop_codes[is_leg]
+    legs = pd.DataFrame({
+        "date": stop_dates[is_leg],
+        "from_city": pd.Categorical.from_codes(from_codes, dtype=cities),
+        "to_city": pd.Categorical.from_codes(to_codes, dtype=cities),
+        "km": dist[from_codes, to_codes]
+    })
+    return legs
+
+def process_many(schedules, cities_df, base_city="Dallas", chunk=100, n_jobs=-1):
+    """
+    Compute travel legs for many schedules (e.g. one per team or season) in parallel.
+    base_city is a single city or one per schedule. Schedules are sent to worker
+    processes in batches of `chunk` to amortize pickling overhead.
+    Returns the legs of all schedules, indexed by (schedule, leg).
+    """
+    from joblib import Parallel, delayed
+
+    if len(schedules) == 0:
+        raise ValueError("process_many needs at least one schedule")
+    bases = [base_city] * len(schedules) if isinstance(base_city, str) else list(base_city)
+    if len(bases) != len(schedules):
+        raise ValueError(f"Got {len(bases)} base cities for {len(schedules)} schedules")
+    legs = Parallel(n_jobs=n_jobs, prefer="processes", batch_size=chunk)(
+        delayed(compute_trip_legs)(df, cities_df, base) for df, base in zip(schedules, bases)
+    )
+    return pd.concat(legs, keys=range(len(legs)), names=["schedule", "leg"])
 
 def basic_cost_model(km_series, seed=0):
     """
@@ -77,15 +166,12 @@ def basic_cost_model(km_series, seed=0):
     cost_t = 0.12 * km + seasonal_factor + noise
     Seasonal factor: monthly sine/cosine terms to mimic higher winter/holiday costs.
     """
-    import numpy as np
     rng = np.random.default_rng(seed)
-    costs = []
     dates = km_series.index
-    for dt, km in zip(dates, km_series.values):
-        month = dt.month
-        # seasonality (peaks in Dec/Mar)
-        seasonal = 40.0 + 10.0 * np.sin(2 * np.pi * (month-1) / 12.0) + 8.0 * np.cos(2 * np.pi * (month-3) / 12.0)
-        noise = rng.normal(0, 25.0)
-        cost = 0.12 * km + seasonal + noise
-        costs.append(max(50.0, cost))  # floor at 50
+    month = dates.month.to_numpy()
+    km = km_series.to_numpy()
+    # seasonality (peaks in Dec/Mar)
+    seasonal = 40.0 + 10.0 * np.sin(2 * np.pi * (month-1) / 12.0) + 8.0 * np.cos(2 * np.pi * (month-3) / 12.0)
+    noise = rng.normal(0, 25.0, size=km.shape[0])
+    costs = np.maximum(50.0, 0.12 * km + seasonal + noise)  # floor at 50
     return pd.Series(costs, index=dates)
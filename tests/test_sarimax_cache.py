@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+from src.analysis import fit_sarimax
+
+ORDER, SEASONAL = (1, 0, 1), (0, 0, 0, 0)
+
+rng = np.random.default_rng(0)
+X = rng.uniform(0, 3000, 40)
+Y = 0.1 * X + rng.normal(0, 20, 40)
+
+
+def series(n, start="2024-01-01", exog_name="km"):
+    idx = pd.date_range(start, periods=n, freq="W-MON")
+    return pd.Series(Y[:n], idx), pd.Series(X[:n], idx, name=exog_name)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return str(tmp_path / "sarimax.pkl")
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    """Records start_params of every SARIMAX.fit call, i.e. every refit."""
+    calls = []
+    fit = SARIMAX.fit
+
+    def counting_fit(self, *args, **kwargs):
+        calls.append(kwargs.get("start_params"))
+        return fit(self, *args, **kwargs)
+
+    monkeypatch.setattr(SARIMAX, "fit", counting_fit)
+    return calls
+
+
+def test_same_data_reuses_cached_fit(cache, fits):
+    first = fit_sarimax(*series(30), ORDER, SEASONAL, cache_path=cache)
+    again = fit_sarimax(*series(30), ORDER, SEASONAL, cache_path=cache)
+    assert len(fits) == 1
+    np.testing.assert_allclose(again.params, first.params)
+
+
+def test_longer_data_is_appended_without_refit(cache, fits):
+    first = fit_sarimax(*series(30), ORDER, SEASONAL, cache_path=cache)
+    longer = fit_sarimax(*series(35), ORDER, SEASONAL, cache_path=cache)
+    assert len(fits) == 1
+    assert longer.model.nobs == 35
+    np.testing.assert_allclose(longer.params, first.params)
+
+
+def test_same_values_on_other_dates_refit_warm(cache, fits):
+    first = fit_sarimax(*series(35), ORDER, SEASONAL, cache_path=cache)
+    moved = fit_sarimax(*series(35, start="2025-06-02"), ORDER, SEASONAL, cache_path=cache)
+    assert len(fits) == 2
+    np.testing.assert_allclose(fits[1], first.params)
+    assert moved.model.data.row_labels[0] == pd.Timestamp("2025-06-02")
+
+
+def test_renamed_exog_refits(cache, fits):
+    fit_sarimax(*series(30), ORDER, SEASONAL, cache_path=cache)
+    renamed = fit_sarimax(*series(30, exog_name="miles"), ORDER, SEASONAL, cache_path=cache)
+    assert len(fits) == 2
+    assert renamed.model.exog_names == ["miles"]
+
+
+def test_statsmodels_upgrade_refits(cache, fits, monkeypatch):
+    fit_sarimax(*series(30), ORDER, SEASONAL, cache_path=cache)
+    monkeypatch.setattr(statsmodels, "__version__", statsmodels.__version__ + ".post1")
+    fit_sarimax(*series(30), ORDER, SEASONAL, cache_path=cache)
+    assert len(fits) == 2
+
+
+def test_unreadable_cache_refits(cache, fits):
+    with open(cache, "wb") as f:
+        f.write(b"not a pickle")
+    res = fit_sarimax(*series(30), ORDER, SEASONAL, cache_path=cache)
+    assert len(fits) == 1 and fits[0] is None
+    assert res.model.nobs == 30
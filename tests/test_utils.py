@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.utils as utils
+from src.analysis import DATA_DIR, BASE_CITY
+
+TOLERANCE_KM = 1e-3
+
+
+def reference_km(legs, cities_df):
+    """Leg distances from float64 coordinates through plain float64 haversine."""
+    coords = cities_df.set_index("city")[["lat", "lon"]].astype(np.float64)
+    a = coords.loc[legs["from_city"].astype(str)].to_numpy()
+    b = coords.loc[legs["to_city"].astype(str)].to_numpy()
+    return utils.haversine_vec(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+
+
+@pytest.fixture(autouse=True)
+def fresh_distance_cache():
+    utils._distance_matrix.cache_clear()
+    yield
+    utils._distance_matrix.cache_clear()
+
+
+@pytest.mark.parametrize("backend", ["numpy", "sklearn"])
+def test_float32_coordinates_stay_within_tolerance(monkeypatch, backend):
+    if backend == "sklearn":
+        pytest.importorskip("sklearn")
+        monkeypatch.setattr(utils, "SKLEARN_MIN_CITIES", 1)
+    cities64 = pd.read_csv(os.path.join(DATA_DIR, "cities.csv"))
+    cities32 = cities64.astype({"lat": "float32", "lon": "float32"})
+    sched = pd.read_csv(os.path.join(DATA_DIR, "schedule.csv"))
+
+    legs = utils.compute_trip_legs(sched, cities32, base_city=BASE_CITY)
+    np.testing.assert_allclose(legs["km"], reference_km(legs, cities64), rtol=0, atol=TOLERANCE_KM)